@@ -4,24 +4,33 @@ Flask Technical Analysis Dashboard
 Versione web (Flask + HTML) dell'app con interfaccia Tkinter
 - Una sola file app.py che espone una dashboard moderna in HTML
 - Usa Bootstrap 5 + Plotly.js per grafici interattivi
-- Dipendenze principali: flask, yfinance, pandas, numpy, ta
+- Dipendenze principali: flask, flask-caching, yfinance, pandas, numpy, orjson (numba opzionale)
 
-Avvio:
-    pip install flask yfinance pandas numpy ta plotly
-    python app.py
+Avvio (sviluppo):
+    pip install flask flask-caching yfinance pandas numpy orjson numba plotly
+    python Analisi_con_dash_html.py
+
+Produzione (pre-fork, un worker per core + thread per l'I/O di rete):
+    gunicorn -w 4 -k gthread --threads 4 Analisi_con_dash_html:app
 
 Poi apri il browser su: http://127.0.0.1:5000/
 """
 
-import json
+import base64
+import threading
+import time
+
 import numpy as np
+import orjson
 import pandas as pd
+import requests as requests_lib
 import yfinance as yf
-from ta.momentum import RSIIndicator
-from ta.trend import MACD
-from ta.volatility import BollingerBands
+from requests.adapters import HTTPAdapter
 from datetime import datetime
-from flask import Flask, request, render_template_string
+from flask import Flask, make_response, request
+from flask_caching import Cache
+
+from utils._njit import NUMBA_AVAILABLE, _signal_scan, compute_indicators
 
 # ----------------------------
 # Modello dati e indicatori
@@ -31,103 +40,145 @@ class Company:
     def __init__(self, symbol: str):
         self.symbol = symbol.upper()
         self.technical_indicators: pd.DataFrame | None = None
-        self.prices: pd.Series | None = None
-
-
-def generate_buy_sell_signals(condition_buy, condition_sell, dataframe: pd.DataFrame, strategy: str):
-    """Genera segnali Buy/Sell in base a due condizioni booleane.
-    Mantiene lo stesso spirito della versione Tkinter.
-    Ritorna anche l'ultimo segnale (stringa)."""
-    last_signal = None
-    indicator_state = []  # stato cumulativo ("Buy" dopo un buy finché non arriva sell)
-    buy = []
-    sell = []
-
-    for i in range(len(dataframe)):
-        if condition_buy(i, dataframe) and last_signal != 'Buy':
-            last_signal = 'Buy'
-            buy.append(dataframe['Close'].iloc[i])
-            sell.append(np.nan)
-        elif condition_sell(i, dataframe) and last_signal == 'Buy':
-            last_signal = 'Sell'
-            buy.append(np.nan)
-            sell.append(dataframe['Close'].iloc[i])
-        else:
-            buy.append(np.nan)
-            sell.append(np.nan)
-        indicator_state.append(last_signal)
-
-    dataframe[f'{strategy}_Indicator'] = np.array(indicator_state, dtype=object)
-    dataframe[f'{strategy}_Buy'] = np.array(buy, dtype=float)
-    dataframe[f'{strategy}_Sell'] = np.array(sell, dtype=float)
-    return last_signal
+        # Prezzi come buffer float64 contiguo (ingresso diretto dei kernel),
+        # con l'indice temporale tenuto a parte
+        self.prices: np.ndarray | None = None
+        self.dates: pd.DatetimeIndex | None = None
+
+
+def generate_buy_sell_signals(buy_cond: np.ndarray, sell_cond: np.ndarray, close: np.ndarray, strategy: str):
+    """Genera segnali Buy/Sell da due maschere booleane (array NumPy).
+    Ritorna (colonne, ultimo segnale): un dict di array pronti per il
+    DataFrame degli indicatori e l'etichetta 'Buy'/'Sell'/'None'."""
+    # La regola "nessun Buy duplicato finché non interviene un Sell" è una
+    # scansione sequenziale con dipendenza tra iterazioni: la deleghiamo al
+    # kernel compilato (o al suo fallback puro Python).
+    buy, sell, state = _signal_scan(
+        np.ascontiguousarray(buy_cond, dtype=np.bool_),
+        np.ascontiguousarray(sell_cond, dtype=np.bool_),
+        close,
+    )
 
+    # Lo stato resta int8 (-1/0/1): niente colonna object piena di stringhe,
+    # l'etichetta serve solo per l'ultimo valore.
+    cols = {
+        f'{strategy}_Indicator': state,
+        f'{strategy}_Buy': buy,
+        f'{strategy}_Sell': sell,
+    }
+    if state.size and state[-1] == 1:
+        return cols, 'Buy'
+    if state.size and state[-1] == -1:
+        return cols, 'Sell'
+    return cols, 'None'
 
-def get_macd(company: Company) -> str:
-    df = company.technical_indicators
-    # Parametri identici al codice originale
-    window_slow, window_fast, signal = 26, 12, 9
-    macd_calc = MACD(company.prices, window_slow=window_slow, window_fast=window_fast, window_sign=signal)
-    df['MACD'] = macd_calc.macd()
-    df['MACD_Histogram'] = macd_calc.macd_diff()
-    df['MACD_Signal'] = macd_calc.macd_signal()
 
+def get_macd(close: np.ndarray, macd_arr: np.ndarray, sig_arr: np.ndarray, hist_arr: np.ndarray):
     # Nota: manteniamo le condizioni originali (Buy quando MACD < Signal)
-    last = generate_buy_sell_signals(
-        lambda x, d: d['MACD'].values[x] < d['MACD_Signal'].values[x],
-        lambda x, d: d['MACD'].values[x] > d['MACD_Signal'].values[x],
-        df,
-        'MACD'
-    )
-    return last or 'None'
+    cols, last = generate_buy_sell_signals(macd_arr < sig_arr, macd_arr > sig_arr, close, 'MACD')
+    cols.update({'MACD': macd_arr, 'MACD_Signal': sig_arr, 'MACD_Histogram': hist_arr})
+    return cols, last
 
 
-def get_rsi(company: Company, rsi_time_period: int = 20, low_rsi: int = 40, high_rsi: int = 70) -> str:
-    df = company.technical_indicators
-    rsi_indicator = RSIIndicator(company.prices, window=rsi_time_period)
-    df['RSI'] = rsi_indicator.rsi()
+def get_rsi(close: np.ndarray, rsi_arr: np.ndarray, low_rsi: int = 40, high_rsi: int = 70):
+    cols, last = generate_buy_sell_signals(rsi_arr < low_rsi, rsi_arr > high_rsi, close, 'RSI')
+    cols['RSI'] = rsi_arr
+    return cols, last
 
-    last = generate_buy_sell_signals(
-        lambda x, d: d['RSI'].values[x] < low_rsi,
-        lambda x, d: d['RSI'].values[x] > high_rsi,
-        df,
-        'RSI'
-    )
-    return last or 'None'
 
-
-def get_bollinger_bands(company: Company, window: int = 20) -> str:
-    df = company.technical_indicators
-    bb = BollingerBands(close=company.prices, window=window, window_dev=2)
-    df['Bollinger_Bands_Middle'] = bb.bollinger_mavg()
-    df['Bollinger_Bands_Upper'] = bb.bollinger_hband()
-    df['Bollinger_Bands_Lower'] = bb.bollinger_lband()
-
-    last = generate_buy_sell_signals(
-        lambda x, d: d['Close'].values[x] < d['Bollinger_Bands_Lower'].values[x],
-        lambda x, d: d['Close'].values[x] > d['Bollinger_Bands_Upper'].values[x],
-        df,
-        'Bollinger_Bands'
-    )
-    return last or 'None'
+def get_bollinger_bands(close: np.ndarray, mid_arr: np.ndarray, upper_arr: np.ndarray, lower_arr: np.ndarray):
+    cols, last = generate_buy_sell_signals(close < lower_arr, close > upper_arr, close, 'Bollinger_Bands')
+    cols.update({
+        'Bollinger_Bands_Middle': mid_arr,
+        'Bollinger_Bands_Upper': upper_arr,
+        'Bollinger_Bands_Lower': lower_arr,
+    })
+    return cols, last
 
 
 def set_technical_indicators(company: Company):
-    company.technical_indicators = pd.DataFrame()
-    company.technical_indicators['Close'] = company.prices
-    last_macd = get_macd(company)
-    last_rsi = get_rsi(company)
-    last_bb = get_bollinger_bands(company)
+    """Calcola tutti gli indicatori con un'unica passata fusa su `close`
+    e costruisce il DataFrame in un colpo solo: un'unica allocazione
+    contigua invece di una colonna (= un blocco pandas) alla volta."""
+    close = company.prices
+
+    # Parametri identici al codice originale (MACD 12/26/9, RSI 20, BB 20/2)
+    macd_arr, sig_arr, hist_arr, rsi_arr, mid_arr, upper_arr, lower_arr = compute_indicators(close)
+
+    macd_cols, last_macd = get_macd(close, macd_arr, sig_arr, hist_arr)
+    rsi_cols, last_rsi = get_rsi(close, rsi_arr)
+    bb_cols, last_bb = get_bollinger_bands(close, mid_arr, upper_arr, lower_arr)
+
+    data = {'Close': close}
+    data.update(macd_cols)
+    data.update(rsi_cols)
+    data.update(bb_cols)
+    company.technical_indicators = pd.DataFrame(data, index=company.dates, copy=False)
     return {
         'MACD': last_macd,
         'RSI': last_rsi,
         'BOLL': last_bb,
     }
 
+# ----------------------------
+# Cache dello storico Yahoo
+# ----------------------------
+# La chiamata di rete a Yahoo domina la latenza end-to-end (centinaia di ms):
+# teniamo in RAM solo ciò che l'app usa — (indice temporale, chiusure) — per
+# (symbol, period), con un TTL breve per i periodi intraday e lungo per
+# quelli pluriennali.
+_HISTORY_CACHE: dict[tuple[str, str], tuple[float, tuple[pd.DatetimeIndex, np.ndarray]]] = {}
+_HISTORY_LOCK = threading.Lock()  # i worker gthread servono richieste concorrenti
+_INTRADAY_PERIODS = {'1d', '5d'}
+
+# Sessione HTTP condivisa: riusa la connessione TCP/TLS verso Yahoo invece
+# di rifare l'handshake a ogni richiesta
+_YF_SESSION = requests_lib.Session()
+_YF_SESSION.headers.update({'User-Agent': 'ta-dashboard/1.0'})
+_YF_SESSION.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
+
+def _history_ttl(period: str) -> float:
+    return 60.0 if period in _INTRADAY_PERIODS else 86400.0
+
+
+def get_history(symbol: str, period: str) -> tuple[pd.DatetimeIndex, np.ndarray]:
+    """Scarica lo storico da Yahoo, riusando la copia in cache se fresca.
+    Ritorna (dates, close): solo la colonna Close viene conservata, il
+    resto del DataFrame (OHLV, dividendi, split) viene scartato subito."""
+    key = (symbol, period)
+    now = time.monotonic()
+    with _HISTORY_LOCK:
+        cached = _HISTORY_CACHE.get(key)
+    if cached is not None and now - cached[0] < _history_ttl(period):
+        return cached[1]
+
+    hist = yf.download(symbol, period=period, progress=False, actions=False,
+                       auto_adjust=True, threads=False, session=_YF_SESSION)
+    if hist.empty:
+        data = (hist.index, np.empty(0, dtype=np.float64))
+    else:
+        close_col = hist['Close']
+        if isinstance(close_col, pd.DataFrame):  # colonne multi-livello di yf.download
+            close_col = close_col.iloc[:, 0]
+        data = (hist.index, close_col.to_numpy(dtype=np.float64, copy=False))
+
+    with _HISTORY_LOCK:
+        if data[1].size == 0:
+            # Ticker sconosciuto o errore lato Yahoo: non avvelenare la cache
+            _HISTORY_CACHE.pop(key, None)
+        else:
+            _HISTORY_CACHE[key] = (now, data)
+    return data
+
+
 # ----------------------------
 # App Flask
 # ----------------------------
 app = Flask(__name__)
+# Cache delle risposte: una pagina già renderizzata per (symbol, period)
+# viene servita dalla RAM senza rifare fetch/indicatori/serializzazione
+cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 60})
 
 # Template HTML (Jinja2) incorporato per semplicità
 TEMPLATE = r"""
@@ -137,8 +188,10 @@ TEMPLATE = r"""
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
     <title>📈 Technical Analysis Dashboard</title>
+    <link rel="preconnect" href="https://cdn.jsdelivr.net">
+    <link rel="preconnect" href="https://cdn.plot.ly">
     <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <script src="https://cdn.plot.ly/plotly-2.35.2.min.js"></script>
+    <script defer src="https://cdn.plot.ly/plotly-3.0.1.min.js"></script>
     <style>
       body { background: #0f1623; color: #ecf0f1; }
       .card { background: #1b2433; border: none; border-radius: 16px; box-shadow: 0 10px 24px rgba(0,0,0,.2); }
@@ -237,7 +290,9 @@ TEMPLATE = r"""
 
     {% if not error %}
     <script>
-      const data = {{ data_json | safe }};
+      // I dati dei grafici arrivano da /api/chart dopo il caricamento del DOM:
+      // l'HTML resta piccolo (e cacheabile) e Plotly disegna appena pronti
+      function renderCharts(data) {
 
       // --- PRICE + SIGNALS ---
       const traceClose = { x: data.dates, y: data.close, type: 'scatter', mode: 'lines', name: 'Close' };
@@ -246,7 +301,7 @@ TEMPLATE = r"""
       Plotly.newPlot('chart_price', [traceClose, traceBuy, traceSell], {
         paper_bgcolor: '#1b2433', plot_bgcolor: '#1b2433',
         font: {color: '#e2e8f0'},
-        title: 'Prezzo di Chiusura & Segnali (Ultimo: {{ last_signals.MACD }}, {{ last_signals.RSI }}, {{ last_signals.BOLL }})',
+        title: {text: 'Prezzo di Chiusura & Segnali (Ultimo: {{ last_signals.MACD }}, {{ last_signals.RSI }}, {{ last_signals.BOLL }})'},
         xaxis: {gridcolor: '#2b3550'}, yaxis: {gridcolor: '#2b3550'}
       }, {responsive: true});
 
@@ -256,14 +311,14 @@ TEMPLATE = r"""
       const tHist = { x: data.dates, y: data.macd_hist, type: 'bar', name: 'Histogram' };
       Plotly.newPlot('chart_macd', [tMACD, tSignal, tHist], {
         paper_bgcolor: '#1b2433', plot_bgcolor: '#1b2433', font: {color: '#e2e8f0'},
-        title: 'MACD', xaxis: {gridcolor: '#2b3550'}, yaxis: {gridcolor: '#2b3550'}
+        title: {text: 'MACD'}, xaxis: {gridcolor: '#2b3550'}, yaxis: {gridcolor: '#2b3550'}
       }, {responsive: true});
 
       // --- RSI ---
       const tRSI = { x: data.dates, y: data.rsi, type: 'scatter', mode: 'lines', name: 'RSI' };
       Plotly.newPlot('chart_rsi', [tRSI], {
         paper_bgcolor: '#1b2433', plot_bgcolor: '#1b2433', font: {color: '#e2e8f0'},
-        title: 'RSI (40-70 shaded)', xaxis: {gridcolor: '#2b3550'}, yaxis: {gridcolor: '#2b3550', range:[0,100], dtick: 10},
+        title: {text: 'RSI (40-70 shaded)'}, xaxis: {gridcolor: '#2b3550'}, yaxis: {gridcolor: '#2b3550', range:[0,100], dtick: 10},
         shapes: [
           { type:'rect', xref:'paper', x0:0, x1:1, yref:'y', y0:40, y1:70, fillcolor:'#3b82f6', opacity:0.15, line:{width:0} },
           { type:'line', xref:'paper', x0:0, x1:1, yref:'y', y0:40, y1:40, line:{dash:'dot'} },
@@ -277,20 +332,64 @@ TEMPLATE = r"""
       const tUp  = { x: data.dates, y: data.bb_up,  type: 'scatter', mode: 'lines', name: 'Upper' };
       const tLo  = { x: data.dates, y: data.bb_low, type: 'scatter', mode: 'lines', name: 'Lower' };
       const tFill = {
-        x: data.dates.concat([...data.dates].reverse()),
-        y: data.bb_up.concat([...data.bb_low].reverse()),
+        x: data.dates_fill,
+        y: data.bb_fill_y,
         fill: 'toself', type: 'scatter', mode: 'lines', name: 'Range', opacity: .1
       };
       Plotly.newPlot('chart_bb', [tFill, tMid, tUp, tLo], {
         paper_bgcolor: '#1b2433', plot_bgcolor: '#1b2433', font: {color: '#e2e8f0'},
-        title: 'Bollinger Bands', xaxis: {gridcolor: '#2b3550'}, yaxis: {gridcolor: '#2b3550'}
+        title: {text: 'Bollinger Bands'}, xaxis: {gridcolor: '#2b3550'}, yaxis: {gridcolor: '#2b3550'}
       }, {responsive: true});
+
+      }
+
+      // /api/chart può rispondere 404/502 con {"error": ...}: in quel caso
+      // mostriamo l'errore nella pagina invece di passare dati vuoti a Plotly
+      function showChartError(message) {
+        const alert = document.createElement('div');
+        alert.className = 'alert alert-danger';
+        alert.textContent = message;
+        document.getElementById('chart_price').closest('.card').before(alert);
+      }
+
+      document.addEventListener('DOMContentLoaded', () => {
+        fetch('/api/chart?symbol={{ symbol }}&period={{ period }}')
+          .then(async (r) => {
+            const data = await r.json();
+            if (!r.ok || data.error) {
+              throw new Error(data.error || ('HTTP ' + r.status));
+            }
+            renderCharts(data);
+          })
+          .catch(err => showChartError('Errore nel caricamento dei grafici: ' + err.message));
+      });
     </script>
     {% endif %}
   </body>
 </html>
 """
 
+# Template compilato una volta sola all'import: evita il lookup/hash della
+# sorgente che render_template_string rifarebbe a ogni richiesta
+_COMPILED_TMPL = app.jinja_env.from_string(TEMPLATE)
+
+
+def _jsonify(s: pd.Series, nan_value=None) -> np.ndarray:
+    """Serie numerica → array float64.
+    `nan_value` consente di forzare un valore diverso (es. 0 per le barre)."""
+    a = s.to_numpy(dtype=np.float64)
+    if nan_value is not None:
+        a = np.nan_to_num(a, nan=nan_value)
+    return a
+
+
+def _typed_array(a: np.ndarray) -> dict:
+    """Array float64 → typed array Plotly ({dtype, bdata}): base64 dei
+    byte grezzi, ~30% più compatto dei letterali decimali JSON e decodificato
+    dal browser senza parsing numerico. I NaN restano NaN (buchi nel plot)."""
+    a = np.ascontiguousarray(a, dtype=np.float64)
+    return {'dtype': 'f8', 'bdata': base64.b64encode(a.tobytes()).decode('ascii')}
+
 
 def rsi_interpretation(val: float) -> str:
     if pd.isna(val):
@@ -302,63 +401,115 @@ def rsi_interpretation(val: float) -> str:
     return f"{val:.1f} (Normal Range)"
 
 
+@cache.memoize(60)
+def _compute(symbol: str, period: str):
+    """Parte costosa della pipeline: fetch, indicatori e payload dei
+    grafici. Memoizzata per (symbol, period); ritorna None quando non ci
+    sono dati. La pagina HTML (leggera) e l'endpoint /api/chart attingono
+    entrambi da qui."""
+    dates, close = get_history(symbol, period)
+    if close.size == 0:
+        return None
+    last_bar_ns = dates[-1].value  # timestamp dell'ultima barra, per l'ETag
+
+    company = Company(symbol)
+    company.prices = close
+    company.dates = dates
+
+    last_signals = set_technical_indicators(company)
+    ind = company.technical_indicators
+
+    # KPI (direttamente su NumPy, senza dispatch pandas)
+    last_price = float(company.prices[-1])
+    high = float(company.prices.max())
+    low = float(company.prices.min())
+    change_pct = float(((company.prices[-1] / company.prices[0]) - 1) * 100)
+    n_points = int(company.prices.size)
+
+    # Dati per grafici: colonne numeriche come typed array binari Plotly,
+    # date come stringhe. L'area delle bande viene chiusa lato server
+    # (slicing NumPy) invece che con concat/reverse in JavaScript.
+    date_strs = ind.index.strftime('%Y-%m-%d').tolist()
+    bb_up_arr = _jsonify(ind['Bollinger_Bands_Upper'])
+    bb_low_arr = _jsonify(ind['Bollinger_Bands_Lower'])
+    data_payload = {
+        'dates': date_strs,
+        'dates_fill': date_strs + date_strs[::-1],
+        'close': _typed_array(_jsonify(ind['Close'])),
+        'price_buy': _typed_array(_jsonify(ind.get('MACD_Buy', pd.Series([np.nan]*len(ind))))),
+        'price_sell': _typed_array(_jsonify(ind.get('MACD_Sell', pd.Series([np.nan]*len(ind))))),
+        'macd': _typed_array(_jsonify(ind['MACD'])),
+        'macd_signal': _typed_array(_jsonify(ind['MACD_Signal'])),
+        'macd_hist': _typed_array(_jsonify(ind['MACD_Histogram'], nan_value=0)),
+        'rsi': _typed_array(_jsonify(ind['RSI'])),
+        'bb_mid': _typed_array(_jsonify(ind['Bollinger_Bands_Middle'])),
+        'bb_up':  _typed_array(bb_up_arr),
+        'bb_low': _typed_array(bb_low_arr),
+        'bb_fill_y': _typed_array(np.concatenate((bb_up_arr, bb_low_arr[::-1]))),
+    }
+
+    # L'ETag cambia solo quando arriva una nuova barra: il browser può
+    # rivalidare con If-None-Match e ricevere un 304 senza ricalcolo
+    return {
+        'kpi': {
+            'last_price': f"{last_price:,.2f}",
+            'high': f"{high:,.2f}",
+            'low': f"{low:,.2f}",
+            'change_pct': f"{change_pct:,.2f}",
+            'n_points': n_points,
+        },
+        'last_signals': last_signals,
+        'payload': orjson.dumps(data_payload),
+        'etag': f"{symbol}:{period}:{last_bar_ns}",
+    }
+
+
 @app.route('/')
 def index():
     symbol = (request.args.get('symbol') or 'AAPL').upper().strip()
     period = (request.args.get('period') or '1y').strip()
 
     try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period)
-        if hist.empty:
-            return render_template_string(TEMPLATE, error=f"Nessun dato trovato per {symbol}", symbol=symbol, period=period, now=datetime.now().strftime('%Y-%m-%d %H:%M'))
-
-        company = Company(symbol)
-        company.prices = hist['Close']
-
-        last_signals = set_technical_indicators(company)
-        ind = company.technical_indicators
-
-        # KPI
-        last_price = float(company.prices.iloc[-1])
-        high = float(company.prices.max())
-        low = float(company.prices.min())
-        change_pct = float(((company.prices.iloc[-1] / company.prices.iloc[0]) - 1) * 100)
-        n_points = int(len(company.prices))
-
-        # Dati per grafici (serializzabili)
-        dates = [d.strftime('%Y-%m-%d') for d in ind.index]
-        data_payload = {
-            'dates': dates,
-            'close': [None if pd.isna(x) else float(x) for x in ind['Close']],
-            'price_buy': [None if pd.isna(x) else float(x) for x in ind.get('MACD_Buy', pd.Series([np.nan]*len(ind)))],
-            'price_sell': [None if pd.isna(x) else float(x) for x in ind.get('MACD_Sell', pd.Series([np.nan]*len(ind)))],
-            'macd': [None if pd.isna(x) else float(x) for x in ind['MACD']],
-            'macd_signal': [None if pd.isna(x) else float(x) for x in ind['MACD_Signal']],
-            'macd_hist': [0 if pd.isna(x) else float(x) for x in ind['MACD_Histogram']],
-            'rsi': [None if pd.isna(x) else float(x) for x in ind['RSI']],
-            'bb_mid': [None if pd.isna(x) else float(x) for x in ind['Bollinger_Bands_Middle']],
-            'bb_up':  [None if pd.isna(x) else float(x) for x in ind['Bollinger_Bands_Upper']],
-            'bb_low': [None if pd.isna(x) else float(x) for x in ind['Bollinger_Bands_Lower']],
-        }
-
-        return render_template_string(
-            TEMPLATE,
-            error=None,
-            symbol=symbol,
-            period=period,
-            now=datetime.now().strftime('%Y-%m-%d %H:%M'),
-            last_price=f"{last_price:,.2f}",
-            high=f"{high:,.2f}",
-            low=f"{low:,.2f}",
-            change_pct=f"{change_pct:,.2f}",
-            n_points=n_points,
-            last_signals=last_signals,
-            data_json=json.dumps(data_payload)
-        )
+        res = _compute(symbol, period)
+    except Exception as e:
+        return _COMPILED_TMPL.render(error=f"Errore: {e}", symbol=symbol, period=period, now=datetime.now().strftime('%Y-%m-%d %H:%M'))
+
+    if res is None:
+        return _COMPILED_TMPL.render(error=f"Nessun dato trovato per {symbol}", symbol=symbol, period=period, now=datetime.now().strftime('%Y-%m-%d %H:%M'))
+
+    html = _COMPILED_TMPL.render(
+        error=None,
+        symbol=symbol,
+        period=period,
+        now=datetime.now().strftime('%Y-%m-%d %H:%M'),
+        last_signals=res['last_signals'],
+        **res['kpi'],
+    )
+    resp = make_response(html)
+    resp.set_etag(res['etag'])
+    return resp.make_conditional(request)
 
+
+@app.get('/api/chart')
+def api_chart():
+    """Dati dei grafici come JSON separato dall'HTML: la pagina resta
+    piccola e il payload viaggia con i suoi header di cache."""
+    symbol = (request.args.get('symbol') or 'AAPL').upper().strip()
+    period = (request.args.get('period') or '1y').strip()
+
+    try:
+        res = _compute(symbol, period)
     except Exception as e:
-        return render_template_string(TEMPLATE, error=f"Errore: {e}", symbol=symbol, period=period, now=datetime.now().strftime('%Y-%m-%d %H:%M'))
+        return {"error": f"Errore: {e}"}, 502
+    if res is None:
+        return {"error": f"Nessun dato trovato per {symbol}"}, 404
+
+    resp = make_response(res['payload'])
+    resp.mimetype = 'application/json'
+    resp.cache_control.private = True
+    resp.cache_control.max_age = 60
+    resp.set_etag(res['etag'])
+    return resp.make_conditional(request)
 
 
 @app.get('/health')
@@ -366,6 +517,20 @@ def health():
     return {"status": "ok", "time": datetime.now().isoformat()}
 
 
+def _warmup_kernels():
+    """Compila i kernel numba all'import (una volta per worker gunicorn),
+    così la prima richiesta reale non paga il picco di compilazione."""
+    if not NUMBA_AVAILABLE:
+        return
+    dummy = np.linspace(100.0, 110.0, 256)
+    compute_indicators(dummy)
+    _signal_scan(dummy > 105.0, dummy < 105.0, dummy)
+
+
+_warmup_kernels()
+
+
 if __name__ == '__main__':
+    # Server di sviluppo; in produzione usare gunicorn (vedi docstring)
     print("🚀 Avvio Flask Technical Analysis Dashboard su http://127.0.0.1:5000/")
-    app.run(debug=True)
+    app.run(threaded=True)
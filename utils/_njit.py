@@ -0,0 +1,152 @@
+"""Kernel numerici con supporto Numba opzionale.
+
+Se numba non è installato, ``njit`` degrada a un decoratore no-op e i
+kernel girano come puro Python/NumPy: più lenti ma identici nei risultati.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # fallback senza numba
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
+
+
+@njit(cache=True, fastmath=True)
+def compute_indicators(close, n_bb=20, k_bb=2.0, win_fast=12, win_slow=26, win_sig=9, n_rsi=20):
+    """Calcola MACD, RSI e bande di Bollinger in un'unica scansione di
+    ``close``: stesso numero di operazioni, un solo attraversamento
+    dell'array invece di tre (kernel fusion).
+
+    EMA con seed SMA, RSI con smoothing di Wilder, Bollinger con somma e
+    somma dei quadrati correnti (O(N) invece di O(N*W)).
+    Ritorna (macd, macd_signal, macd_hist, rsi, bb_mid, bb_up, bb_lo)."""
+    N = close.shape[0]
+    macd = np.full(N, np.nan, dtype=np.float64)
+    macd_sig = np.full(N, np.nan, dtype=np.float64)
+    macd_hist = np.full(N, np.nan, dtype=np.float64)
+    rsi = np.full(N, np.nan, dtype=np.float64)
+    bb_mid = np.full(N, np.nan, dtype=np.float64)
+    bb_up = np.full(N, np.nan, dtype=np.float64)
+    bb_lo = np.full(N, np.nan, dtype=np.float64)
+
+    alpha_f = 2.0 / (win_fast + 1.0)
+    alpha_s = 2.0 / (win_slow + 1.0)
+    alpha_g = 2.0 / (win_sig + 1.0)
+
+    ema_f = 0.0
+    ema_s = 0.0
+    sig = 0.0
+    sum_f = 0.0
+    sum_s = 0.0
+    sum_sig = 0.0
+    n_macd = 0  # valori MACD accumulati per il seed della linea di segnale
+    avg_gain = 0.0
+    avg_loss = 0.0
+    sum_gain = 0.0
+    sum_loss = 0.0
+    s = 0.0
+    s2 = 0.0
+
+    for i in range(N):
+        c = close[i]
+
+        # --- EMA veloce/lenta (seed = SMA della prima finestra) ---
+        if i < win_fast:
+            sum_f += c
+            if i == win_fast - 1:
+                ema_f = sum_f / win_fast
+        else:
+            ema_f += alpha_f * (c - ema_f)
+        if i < win_slow:
+            sum_s += c
+            if i == win_slow - 1:
+                ema_s = sum_s / win_slow
+        else:
+            ema_s += alpha_s * (c - ema_s)
+
+        if i >= win_slow - 1:
+            m = ema_f - ema_s
+            macd[i] = m
+            # linea di segnale: EMA del MACD, anch'essa con seed SMA
+            if n_macd < win_sig:
+                sum_sig += m
+                n_macd += 1
+                if n_macd == win_sig:
+                    sig = sum_sig / win_sig
+                    macd_sig[i] = sig
+                    macd_hist[i] = m - sig
+            else:
+                sig += alpha_g * (m - sig)
+                macd_sig[i] = sig
+                macd_hist[i] = m - sig
+
+        # --- RSI (smoothing di Wilder) ---
+        if i > 0:
+            diff = c - close[i - 1]
+            gain = diff if diff > 0.0 else 0.0
+            loss = -diff if diff < 0.0 else 0.0
+            if i <= n_rsi:
+                sum_gain += gain
+                sum_loss += loss
+                if i == n_rsi:
+                    avg_gain = sum_gain / n_rsi
+                    avg_loss = sum_loss / n_rsi
+            else:
+                avg_gain = (avg_gain * (n_rsi - 1) + gain) / n_rsi
+                avg_loss = (avg_loss * (n_rsi - 1) + loss) / n_rsi
+            if i >= n_rsi:
+                if avg_loss == 0.0:
+                    rsi[i] = 100.0
+                else:
+                    rsi[i] = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+        # --- Bollinger: somma e somma dei quadrati correnti ---
+        s += c
+        s2 += c * c
+        if i >= n_bb:
+            old = close[i - n_bb]
+            s -= old
+            s2 -= old * old
+        if i >= n_bb - 1:
+            mean = s / n_bb
+            var = s2 / n_bb - mean * mean
+            if var < 0.0:  # rumore numerico su serie quasi costanti
+                var = 0.0
+            std = var ** 0.5
+            bb_mid[i] = mean
+            bb_up[i] = mean + k_bb * std
+            bb_lo[i] = mean - k_bb * std
+
+    return macd, macd_sig, macd_hist, rsi, bb_mid, bb_up, bb_lo
+
+
+@njit(cache=True)
+def _signal_scan(buy_cond, sell_cond, close):
+    """Scansione stateful dei segnali: nessun Buy duplicato finché non
+    interviene un Sell. Input: due maschere bool e i prezzi di chiusura
+    (float64). Ritorna (buy, sell, stato) dove stato è int8 con
+    1 = Buy, -1 = Sell, 0 = nessun segnale ancora emesso."""
+    n = close.shape[0]
+    buy = np.full(n, np.nan, dtype=np.float64)
+    sell = np.full(n, np.nan, dtype=np.float64)
+    state = np.zeros(n, dtype=np.int8)
+    last = np.int8(0)
+    for i in range(n):
+        if buy_cond[i] and last != 1:
+            buy[i] = close[i]
+            last = np.int8(1)
+        elif sell_cond[i] and last == 1:
+            sell[i] = close[i]
+            last = np.int8(-1)
+        state[i] = last
+    return buy, sell, state